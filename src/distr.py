@@ -1,29 +1,30 @@
-from abc import ABC, abstractmethod
+from math import floor, log1p
 from random import random
-from typing import Any, Dict, List, Tuple, Type, TypeVar
+from typing import Any, Callable, Iterator, List, Tuple, Type, TypeVar
 
 
-class Computer(ABC):
+class Computer:
     """
-    An abstract base class to inherit, defines the interface for
-    distributed algorithms
+    A base class to inherit, defines the interface for distributed
+    algorithms. Subclasses implement send(), receive() and compute().
+
+    send() returns 0 when there is nothing to send on a port, in which case
+    receive() is not called for the other end of the link.
     """
 
-    @abstractmethod
+    __slots__ = ("output",)
+
     def __init__(self, degree: int, input_data):
         self.output: str | None = None
 
-    @abstractmethod
-    def send(self, port: int) -> str:
-        pass
+    def send(self, port: int) -> int:
+        raise NotImplementedError
 
-    @abstractmethod
-    def receive(self, port: int, message: str) -> None:
-        pass
+    def receive(self, port: int, message: int) -> None:
+        raise NotImplementedError
 
-    @abstractmethod
     def compute(self) -> None:
-        pass
+        raise NotImplementedError
 
 
 # Basic graph types
@@ -33,8 +34,29 @@ Edge = Tuple[Vertex, Vertex]
 # Distributed computing types
 BaseComputer = TypeVar("BaseComputer", bound=Computer)
 Port = int
-PortBinding = Tuple[BaseComputer, Port]
-Link = Tuple[PortBinding, PortBinding]
+# Link i joins port u_ports[i] of vertex us[i] to port v_ports[i] of vertex
+# vs[i], stored as the parallel lists (us, u_ports, vs, v_ports)
+Links = Tuple[List[Vertex], List[Port], List[Vertex], List[Port]]
+
+
+def _bernoulli_indices(n: int, p: float) -> Iterator[int]:
+    """
+    Yields, in increasing order, the indices in range(n) that succeed an
+    independent Bernoulli(p) trial, by drawing the geometric gaps between
+    successes instead of one trial per index (Batagelj & Brandes, 2005).
+    """
+    if p <= 0:
+        return
+    if p >= 1:
+        yield from range(n)
+        return
+    log_q = log1p(-p)
+    i = -1
+    while True:
+        i += 1 + floor(log1p(-random()) / log_q)
+        if i >= n:
+            return
+        yield i
 
 
 def ER(size: int, p: float) -> Tuple[List[Vertex], List[Edge]]:
@@ -44,10 +66,14 @@ def ER(size: int, p: float) -> Tuple[List[Vertex], List[Edge]]:
     V: List[Vertex] = list(range(size))
     E: List[Edge] = []
 
-    for i, u in enumerate(V):
-        for v in V[i + 1 : :]:
-            if random() <= p:
-                E.append((u, v))
+    # Walk the strictly lower triangle row by row: index i maps to the edge
+    # (u, v) with u < v, where row v holds the v edges (0, v) .. (v - 1, v)
+    v, row_start = 1, 0
+    for i in _bernoulli_indices(size * (size - 1) // 2, p):
+        while i - row_start >= v:
+            row_start += v
+            v += 1
+        E.append((i - row_start, v))
     return (V, E)
 
 
@@ -59,11 +85,10 @@ def ER_bipartite(
     """
     A: List[Vertex] = list(range(size_a))
     B: List[Vertex] = list(range(size_a, size_a + size_b))
-    E: List[Edge] = []
-
-    for a, b in [(a, b) for a in A for b in B]:
-        if random() <= p:
-            E.append((a, b))
+    E: List[Edge] = [
+        (i // size_b, size_a + i % size_b)
+        for i in _bernoulli_indices(size_a * size_b, p)
+    ]
     return ((A, B), E)
 
 
@@ -74,54 +99,90 @@ class Network:
         receive()
         compute()
     until they are all done.
+
+    Within a step the computers do not observe each other: every message is
+    delivered only after all computers have sent, so the order in which
+    computers are visited within a step is unspecified.
     """
 
     def __init__(self, V: List[Any], E: List[Edge], type: Type[BaseComputer]):
-        degrees: List[int] = [0 for _ in V]
+        # Number the ports of every vertex in edge order, which leaves the
+        # final counts as the degrees
+        degrees: List[int] = [0] * len(V)
+        u_ports: List[Port] = []
+        v_ports: List[Port] = []
         for u, v in E:
             degrees[u] += 1
+            u_ports.append(degrees[u])
             degrees[v] += 1
+            v_ports.append(degrees[v])
+        self.links: Links = (
+            [u for u, _ in E],
+            u_ports,
+            [v for _, v in E],
+            v_ports,
+        )
         self.computers: List[BaseComputer] = [
             type(degrees[i], v) for i, v in enumerate(V)
         ]
-        port_counts: List[int] = [0 for _ in self.computers]
 
-        def new_port(v: Vertex) -> PortBinding:
-            port_counts[v] += 1
-            return (self.computers[v], port_counts[v])
+        # Adjacency list of every computer: for each of its links, whatever
+        # it sends to port is delivered to peer_receive(peer_port). The
+        # endpoints' methods are bound once up front
+        receives: List[Callable] = [computer.receive for computer in self.computers]
+        self._adj: List[List[Tuple[Port, Callable, Port]]] = [
+            [] for _ in self.computers
+        ]
+        for u, port_u, v, port_v in zip(*self.links):
+            self._adj[u].append((port_u, receives[v], port_v))
+            self._adj[v].append((port_v, receives[u], port_u))
+        self._sends: List[Callable] = [computer.send for computer in self.computers]
+        self._computes: List[Callable] = [
+            computer.compute for computer in self.computers
+        ]
 
-        self.links: List[Link] = [(new_port(u), new_port(v)) for u, v in E]
+        # Computers which have not yet produced an output
+        self._unfinished: List[BaseComputer] = [
+            computer for computer in self.computers if computer.output is None
+        ]
 
     def __repr__(self) -> str:
-        return f"Network: {len(self.computers)} computers, {len(self.links)} links:\n{self.computers}"
+        return f"Network: {len(self.computers)} computers, {len(self.links[0])} links:\n{self.computers}"
 
     def run_iteration(self):
         # Keep messages waiting such that they are received only in the
         # receive step
-        mailbox: Dict[PortBinding, str] = {}
+        pending: List[Tuple[Callable, Port, int]] = []
+        deliver = pending.append
 
-        # Send
-        for (c1, port1), (c2, port2) in self.links:
-            mailbox[(c1, port1)] = c2.send(port2)
-            mailbox[(c2, port2)] = c1.send(port1)
+        # Send, an empty message (0) is not delivered at all
+        for send, adj in zip(self._sends, self._adj):
+            for port, peer_receive, peer_port in adj:
+                msg = send(port)
+                if msg:
+                    deliver((peer_receive, peer_port, msg))
 
         # Receive
-        for (computer, port), msg in mailbox.items():
-            computer.receive(port, msg)
+        for receive, port, msg in pending:
+            receive(port, msg)
 
         # Compute
-        for computer in self.computers:
-            computer.compute()
+        for compute in self._computes:
+            compute()
+
+        self._unfinished = [
+            computer for computer in self._unfinished if computer.output is None
+        ]
 
-    def run_until_done(self, round_limit=50):
+    def run_until_done(self, round_limit=50, verbose: bool = False):
         iter = 0
-        while (
-            None in [computer.output for computer in self.computers]
-            and iter < round_limit
-        ):
-            print(f">>> Iteration {iter} >>>")
+        while self._unfinished and iter < round_limit:
+            if verbose:
+                print(f">>> Iteration {iter} >>>")
             self.run_iteration()
             iter += 1
+        if not verbose:
+            return
         if iter == round_limit:
             print(">>> Round limit reached")
             return
@@ -1,20 +1,24 @@
 #!/usr/bin/env python
-from distr import Computer, Port, Network, ER_bipartite
-from enum import Enum
-from typing import Set
-from math import ceil
+from distr import Computer, Network, ER_bipartite
+from typing import Callable, Tuple
 
+# Colors
+WHITE = 0
+BLACK = 1
+COLOR_NAMES = ("WHITE", "BLACK")
 
-class Color(Enum):
-    WHITE = 1
-    BLACK = 2
+# States
+UR = 0
+MR = 1
+US = 2
+MS = 3
+STATE_NAMES = ("UR", "MR", "US", "MS")
 
-
-class State(Enum):
-    UR = 0
-    MR = 1
-    US = 2
-    MS = 3
+# Messages, fit in two bits
+EMPTY = 0
+PROPOSAL = 1
+MATCHED = 2
+ACCEPT = 3
 
 
 """
@@ -46,81 +50,178 @@ compute:
 
 # Bipartite maximal matching
 class MaximalMatcherComputer(Computer):
-    def __init__(self, degree: int, input_data: Color):
+    __slots__ = (
+        "degree",
+        "color",
+        "state",
+        "round",
+        "_mod",
+        "_k",
+        "M",
+        "X",
+        "_outbox",
+        "_receive",
+        "_compute",
+        "_send_port",
+        "_send_msg",
+        "_broadcast",
+    )
+
+    def __init__(self, degree: int, input_data: int):
         super().__init__(degree, input_data)
         self.degree = degree
         self.color = input_data
-        self.state: State = State.UR
+        self._set_state(UR)
         self.round = 1
-        self.M: Set[int] = set()
-        self.X: Set[Port] = set(range(1, degree + 1))
+        # round % 2 and ceil(round / 2), kept up to date by compute()
+        self._mod = 1
+        self._k = 1
+        # M and X are sets of ports, stored as bitmasks where bit i is port i
+        self.M = 0
+        self.X = (1 << (degree + 1)) - 2
+        self._fill_outbox()
 
     def __repr__(self) -> str:
         return (
-            f"MaxMatcher[{self.color}](d={self.degree},state={self.state})"
+            f"MaxMatcher[{COLOR_NAMES[self.color]}]"
+            f"(d={self.degree},state={STATE_NAMES[self.state]})"
         )
 
     def k(self) -> int:
-        return ceil(self.round / 2)
+        return self._k
 
     def modulus(self) -> int:
-        return self.round % 2
+        return self._mod
+
+    def _set_state(self, state: int):
+        # Bind the handlers for the new state, so that a call only has to
+        # look at the round parity
+        self.state = state
+        self._outbox = _OUTBOX[self.color][state]
+        self._receive = _RECEIVE[self.color][state]
+        self._compute = _COMPUTE[self.color][state]
 
     def set_US(self):
-        self.state = State.US
+        self._set_state(US)
         self.output = "unmatched"
 
     def set_MR(self, port: int):
-        self.state = State.MR
+        self._set_state(MR)
         self.output = f"matched to port {port}"
 
     def set_MS(self, port: int | None = None):
-        self.state = State.MS
+        self._set_state(MS)
         if port:
             self.output = f"matched to p:{port}"
         elif self.output is None:
             raise Exception("You need to set output port")
 
-    def send(self, port: int) -> str:
-        match (self.color, self.modulus(), self.state, self.k()):
-            case (Color.WHITE, 1, State.UR, port):
-                return "proposal"
-            case (Color.WHITE, 1, State.MR, _):
-                return "matched"
-            case (Color.BLACK, 0, State.UR, _) if len(self.M) > 0 and port == min(
-                self.M
-            ):
-                self.set_MR(port)
-                return "accept"
-        return ""
-
-    def receive(self, port: int, message: str) -> None:
-        match (self.color, self.modulus(), self.state):
-            case (Color.BLACK, 1, State.UR):
-                match message:
-                    case "matched":
-                        self.X.remove(port)
-                    case "proposal":
-                        self.M.add(port)
-            case (Color.WHITE, 0, State.UR):
-                if message == "accept":
-                    self.set_MR(port)
+    def _fill_outbox(self):
+        # A computer sends at most one message to a single port and one to
+        # all other ports in a round, so work them out once per round
+        self._send_port, self._send_msg, self._broadcast = self._outbox(self)
+
+    def send(self, port: int) -> int:
+        return self._send_msg if port == self._send_port else self._broadcast
+
+    def receive(self, port: int, message: int) -> None:
+        self._receive(self, port, message)
 
     def compute(self) -> None:
-        match (self.color, self.modulus(), self.state):
-            case (Color.WHITE, 1, State.UR) if self.k() > self.degree:
-                self.set_US()
-            case (Color.WHITE, 1, State.MR):
-                self.set_MS()
-            case (Color.BLACK, 0, State.UR) if len(self.X) == 0:
-                self.set_US()
+        self._compute(self)
         self.round += 1
+        self._mod ^= 1
+        self._k += self._mod
+        self._fill_outbox()
+
+
+# Outboxes are (port, message to port, message to every other port), ports
+# are numbered from 1 so port 0 stands for none
+_NO_MESSAGES = (0, EMPTY, EMPTY)
+
+
+def _outbox_nothing(self: MaximalMatcherComputer) -> Tuple[int, int, int]:
+    return _NO_MESSAGES
+
+
+def _receive_nothing(self: MaximalMatcherComputer, port: int, message: int):
+    pass
+
+
+def _compute_nothing(self: MaximalMatcherComputer):
+    pass
+
+
+def _outbox_white_UR(self: MaximalMatcherComputer) -> Tuple[int, int, int]:
+    return (self._k, PROPOSAL, EMPTY) if self._mod else _NO_MESSAGES
+
+
+def _receive_white_UR(self: MaximalMatcherComputer, port: int, message: int):
+    if not self._mod and message == ACCEPT:
+        self.set_MR(port)
+
+
+def _compute_white_UR(self: MaximalMatcherComputer):
+    if self._mod and self._k > self.degree:
+        self.set_US()
+
+
+def _outbox_white_MR(self: MaximalMatcherComputer) -> Tuple[int, int, int]:
+    return (0, EMPTY, MATCHED) if self._mod else _NO_MESSAGES
+
+
+def _compute_white_MR(self: MaximalMatcherComputer):
+    if self._mod:
+        self.set_MS()
+
+
+def _outbox_black_UR(self: MaximalMatcherComputer) -> Tuple[int, int, int]:
+    # The lowest set bit of M is min(M)
+    if not self._mod and self.M:
+        return ((self.M & -self.M).bit_length() - 1, ACCEPT, EMPTY)
+    return _NO_MESSAGES
+
+
+def _receive_black_UR(self: MaximalMatcherComputer, port: int, message: int):
+    if self._mod:
+        if message == MATCHED:
+            self.X &= ~(1 << port)
+        elif message == PROPOSAL:
+            self.M |= 1 << port
+
+
+def _compute_black_UR(self: MaximalMatcherComputer):
+    if not self._mod:
+        if self._send_msg == ACCEPT:
+            # Sent accept to min(M) this round
+            self.set_MR(self._send_port)
+        elif self.X == 0:
+            self.set_US()
+
+
+# Handlers indexed by [color][state]
+_OUTBOX: Tuple[
+    Tuple[Callable[[MaximalMatcherComputer], Tuple[int, int, int]], ...], ...
+] = (
+    (_outbox_white_UR, _outbox_white_MR, _outbox_nothing, _outbox_nothing),
+    (_outbox_black_UR, _outbox_nothing, _outbox_nothing, _outbox_nothing),
+)
+_RECEIVE: Tuple[
+    Tuple[Callable[[MaximalMatcherComputer, int, int], None], ...], ...
+] = (
+    (_receive_white_UR, _receive_nothing, _receive_nothing, _receive_nothing),
+    (_receive_black_UR, _receive_nothing, _receive_nothing, _receive_nothing),
+)
+_COMPUTE: Tuple[Tuple[Callable[[MaximalMatcherComputer], None], ...], ...] = (
+    (_compute_white_UR, _compute_white_MR, _compute_nothing, _compute_nothing),
+    (_compute_black_UR, _compute_nothing, _compute_nothing, _compute_nothing),
+)
 
 
 if __name__ == "__main__":
     ((A, B), E) = ER_bipartite(7, 11, 0.9)
-    V = [Color.WHITE for _ in A] + [Color.BLACK for _ in B]
+    V = [WHITE for _ in A] + [BLACK for _ in B]
     network = Network(V, E, MaximalMatcherComputer)
     print(network)
 
-    network.run_until_done()
+    network.run_until_done(verbose=True)
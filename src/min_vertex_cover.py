@@ -1,39 +1,75 @@
 #!/usr/bin/env python
 from typing import Any
 from distr import Computer, Network, ER
-from maximal_matching import MaximalMatcherComputer, Color
+from maximal_matching import UR, MR, US, MS, EMPTY, PROPOSAL, MATCHED, ACCEPT
 
 
 
 
 class VertexCoverApproximatingComputer(Computer):
     """
-    Computer which simulates two internal MaximalMatcherComputer's internally,
-    which outputs a 3-approximation of a vertex cover on a generic graph.
+    Computer which simulates the two copies of a MaximalMatcherComputer, the
+    white v1 and the black v2, internally, which outputs a 3-approximation of
+    a vertex cover on a generic graph.
+
+    The copies run in lockstep and the white copy only acts on odd rounds
+    and the black copy only on even rounds, so both are folded into one
+    dispatch on the round parity instead of keeping two computer objects.
     """
+    __slots__ = (
+        "degree",
+        "input_data",
+        "white_state",
+        "black_state",
+        "_mod",
+        "_k",
+        "M",
+        "X",
+    )
+
     def __init__(self, degree: int, input_data: Any = None):
         super().__init__(degree, input_data)
-        self.degree = degree  # not needed other than in __repr__
+        self.degree = degree
         self.input_data = input_data  # not needed other than in __repr__
-        self.v1 = MaximalMatcherComputer(degree, Color.WHITE)
-        self.v2 = MaximalMatcherComputer(degree, Color.BLACK)
+        self.white_state = UR
+        self.black_state = UR
+        # round % 2 and ceil(round / 2), shared by both copies
+        self._mod = 1
+        self._k = 1
+        # The black copy's port sets M and X as bitmasks, bit i is port i.
+        # The white copy needs neither.
+        self.M = 0
+        self.X = (1 << (degree + 1)) - 2
 
     def __repr__(self) -> str:
         return f"VCApproxComputer{self.input_data}(deg={self.degree})"
 
-    def send(self, port: int) -> str:
+    def send(self, port: int) -> int:
         """
         (a) If v1 sends a message m1 to port (v1, i) and v2 sends a message
             m2 to port (v2, i) in the simulation, then v sends the pair (m1, m2)
             to port (v, i) in the physical network.
+
+        Matcher messages fit in two bits, so the pair is packed as (m1 << 2) | m2.
         """
-        m1 = self.v1.send(port)
-        m2 = self.v2.send(port)
-        message = f"{m1};{m2}"
-        # print(f"sending {message}")
-        return message
+        if self._mod:
+            # Only v1 sends on odd rounds
+            if self.white_state == UR:
+                if port == self._k:
+                    return PROPOSAL << 2
+            elif self.white_state == MR:
+                return MATCHED << 2
+        elif (
+            self.black_state == UR
+            and self.M
+            and port == (self.M & -self.M).bit_length() - 1
+        ):
+            # Only v2 sends on even rounds
+            self.black_state = MR
+            return ACCEPT
+        return EMPTY
 
-    def receive(self, port: int, message: str) -> None:
+    def receive(self, port: int, message: int) -> None:
         """
         (b) If v receives a pair (m1, m2) from port (v, i) in the physical network,
             then v1 receives message m2 from port (v1, i) in the simulation,
@@ -41,10 +77,17 @@ class VertexCoverApproximatingComputer(Computer):
             Note that we have here reversed the messages: what came from a
             white node is received by a black node and vice versa.
         """
-        # print(f"received {message}")
-        [m1, m2] = message.split(";")
-        self.v2.receive(port, m1)
-        self.v1.receive(port, m2)
+        if self._mod:
+            # v2 listens to m1 on odd rounds
+            if self.black_state == UR:
+                m1 = message >> 2
+                if m1 == MATCHED:
+                    self.X &= ~(1 << port)
+                elif m1 == PROPOSAL:
+                    self.M |= 1 << port
+        elif self.white_state == UR and message & 3 == ACCEPT:
+            # v1 listens to m2 on even rounds
+            self.white_state = MR
 
     def compute(self) -> None:
         """
@@ -53,15 +96,22 @@ class VertexCoverApproximatingComputer(Computer):
 
         (b) Node v outputs 1 if at least one of its copies v1 or v2 becomes matched.
         """
-        self.v1.compute()
-        self.v2.compute()
-        # print(f"v1: {self.v1.output}; v2: {self.v2.output}")
-        match (self.v1.output, self.v2.output):
-            case (None, None):
-                pass
-            case ("unmatched", "unmatched"):
+        if self._mod:
+            if self.white_state == UR:
+                if self._k > self.degree:
+                    self.white_state = US
+            elif self.white_state == MR:
+                self.white_state = MS
+        elif self.black_state == UR and self.X == 0:
+            self.black_state = US
+        self._mod ^= 1
+        self._k += self._mod
+
+        # A copy has produced an output once it has left state UR
+        if self.white_state != UR and self.black_state != UR:
+            if self.white_state == US and self.black_state == US:
                 self.output = "0 (not in the cover)"
-            case _:
+            else:
                 self.output = "1 (part of the cover)"
 
 
@@ -70,4 +120,4 @@ if __name__ == "__main__":
     network = Network(V, E, VertexCoverApproximatingComputer)
     print(network)
 
-    network.run_until_done(10)
+    network.run_until_done(10, verbose=True)